@@ -1,31 +1,140 @@
+import asyncio
 import hashlib
-import hmac
-import json
+import ipaddress
+import logging
+import ssl
 import time
 from typing import Dict, Any, Optional
+from urllib.request import getproxies
 import httpx
+import orjson
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# hashlib dispatches to OpenSSL's EVP SHA-256, which only picks up the
+# SHA extensions (SHA-NI) on 1.1.1 and newer
+if ssl.OPENSSL_VERSION_INFO < (1, 1, 1):
+    logger.warning(f"{ssl.OPENSSL_VERSION} may not use hardware-accelerated SHA-256 for request signing")
+
+# Response cache lifetimes (seconds) for public endpoints that change slowly
+_TICKER_TTL = 1
+_MARKETS_TTL = 300
+
+# Oldest start_time (relative to now) that get_candles will forward to the API
+_ONE_YEAR_MS = 365 * 24 * 60 * 60 * 1000
+
+# (quote suffix, public API prefix, public API quote) for pairs like BTCUSDT -> B-BTC_USDT
+_SUFFIX_MAP = (
+    ("USDT", "B-", "_USDT"),
+    ("BTC", "B-", "_BTC"),
+    ("INR", "I-", "_INR"),
+)
+
+
+def _make_transport(proxy: Optional[str] = None) -> httpx.AsyncHTTPTransport:
+    """Build a pooled HTTP/2 transport that retries failed connection attempts."""
+    return httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        retries=3,
+        proxy=proxy
+    )
+
+
+def _is_ip_address(host: str, version: type) -> bool:
+    """Check whether a NO_PROXY entry (optionally with a /prefix) is an address of the given type."""
+    try:
+        version(host.split("/")[0])
+    except ValueError:
+        return False
+    return True
+
+
+def _environment_proxies() -> Dict[str, Optional[str]]:
+    """Map httpx mount patterns to proxy URLs (None = no proxy) from HTTP(S)_PROXY, ALL_PROXY and NO_PROXY."""
+    proxy_info = getproxies()
+    proxies: Dict[str, Optional[str]] = {}
+    
+    # Only HTTP proxies; getproxies() also returns things like FTP_PROXY
+    for scheme in ("http", "https", "all"):
+        url = proxy_info.get(scheme)
+        if url:
+            proxies[f"{scheme}://"] = url if "://" in url else f"http://{url}"
+    
+    # NO_PROXY follows curl's rules: "*" disables proxies entirely, and a
+    # domain matches itself and its subdomains (a leading "." only subdomains)
+    for host in (h.strip() for h in proxy_info.get("no", "").split(",")):
+        if host == "*":
+            return {}
+        elif not host:
+            continue
+        elif "://" in host:
+            proxies[host] = None
+        elif _is_ip_address(host, ipaddress.IPv4Address) or host.lower() == "localhost":
+            proxies[f"all://{host}"] = None
+        elif _is_ip_address(host, ipaddress.IPv6Address):
+            proxies[f"all://[{host}]"] = None
+        else:
+            proxies[f"all://*{host}"] = None
+    
+    return proxies
+
 
 class CoinDCXClient:
+    __slots__ = (
+        'api_key', 'secret_key', 'base_url', 'client', '_inner', '_outer',
+        '_markets_cache', '_markets_cache_ts', '_pair_index', '_formatted_pairs',
+        '_response_cache'
+    )
+
     def __init__(self, api_key: str, secret_key: str, base_url: str = "https://api.coindcx.com"):
         self.api_key = api_key
         self.secret_key = secret_key
+        # The secret never changes, so hash the HMAC key pads once and copy
+        # the primed SHA-256 states for each signature
+        key = secret_key.encode('utf-8')
+        if len(key) > 64:
+            key = hashlib.sha256(key).digest()
+        key = key.ljust(64, b'\x00')
+        self._inner = hashlib.sha256(bytes(b ^ 0x36 for b in key))
+        self._outer = hashlib.sha256(bytes(b ^ 0x5c for b in key))
         self.base_url = base_url
-        self.client = httpx.Client(timeout=30.0)
+        # Keep warm connections around so repeated calls skip the TCP+TLS handshake,
+        # and retry failed connection attempts on the same pool. Passing an explicit
+        # transport turns off httpx's own proxy detection, so the environment's
+        # proxies are mounted on matching transports by hand
+        mounts = {
+            pattern: None if proxy is None else _make_transport(proxy)
+            for pattern, proxy in _environment_proxies().items()
+        }
+        self.client = httpx.AsyncClient(transport=_make_transport(), mounts=mounts, timeout=30.0)
+        # markets_details is a large, slow-changing listing; keep it and a
+        # pair -> market index around instead of refetching it per lookup
+        self._markets_cache = None
+        self._markets_cache_ts = 0.0
+        self._pair_index: Dict[str, Dict[str, Any]] = {}
+        self._formatted_pairs: Dict[str, str] = {}
+        # (url, params) -> {"ts", "body", "etag", "last_modified"} for TTL-cached GETs
+        self._response_cache: Dict[tuple, Dict[str, Any]] = {}
 
     def _generate_signature(self, payload: str) -> str:
         """Generate HMAC-SHA256 signature for authenticated requests."""
-        signature = hmac.new(
-            self.secret_key.encode('utf-8'),
-            payload.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        return signature
-
-    def _make_authenticated_request(self, method: str, endpoint: str, payload: Dict[str, Any] = None) -> Dict[str, Any]:
+        inner = self._inner.copy()
+        inner.update(payload.encode('utf-8'))
+        outer = self._outer.copy()
+        outer.update(inner.digest())
+        return outer.hexdigest()
+
+    def _parse(self, response: httpx.Response) -> Dict[str, Any]:
+        """Parse a JSON response body, raising an HTTP error for non-2xx statuses."""
+        if response.status_code < 300:
+            return orjson.loads(response.content)
+        response.raise_for_status()
+
+    async def _make_authenticated_request(self, method: str, endpoint: str, payload: Dict[str, Any] = None) -> Dict[str, Any]:
         """Make authenticated request to CoinDCX API."""
-        timestamp = int(time.time() * 1000)
+        timestamp = time.time_ns() // 1_000_000
         
         if payload is None:
             payload = {}
@@ -33,7 +142,7 @@ class CoinDCXClient:
         # Add timestamp to payload as required by CoinDCX API
         payload["timestamp"] = timestamp
         
-        payload_str = json.dumps(payload, separators=(',', ':'))
+        payload_str = orjson.dumps(payload).decode()  # compact, no whitespace
         signature = self._generate_signature(payload_str)
         
         headers = {
@@ -45,150 +154,229 @@ class CoinDCXClient:
         url = f"{self.base_url}{endpoint}"
         
         # CoinDCX authenticated endpoints are all POST requests
-        response = self.client.post(url, headers=headers, data=payload_str)
+        response = await self.client.post(url, headers=headers, data=payload_str)
+        return self._parse(response)
+
+    async def _cached_get(self, url: str, params: Dict[str, Any] = None, ttl: float = 0) -> Dict[str, Any]:
+        """GET a public URL, serving repeats within ttl seconds from memory and revalidating with ETag/Last-Modified."""
+        if ttl <= 0:
+            response = await self.client.get(url, params=params)
+            return self._parse(response)
         
-        response.raise_for_status()
-        return response.json()
+        key = (url, frozenset(params.items()) if params else None)
+        entry = self._response_cache.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry["ts"] < ttl:
+            return entry["body"]
+        
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        
+        response = await self.client.get(url, params=params, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            # Unchanged upstream; keep the already-parsed body
+            entry["ts"] = now
+            return entry["body"]
+        
+        body = self._parse(response)
+        self._response_cache[key] = {
+            "ts": now,
+            "body": body,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+        return body
 
-    def _make_public_request(self, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def _make_public_request(self, endpoint: str, params: Dict[str, Any] = None, ttl: float = 0) -> Dict[str, Any]:
         """Make public request to CoinDCX API."""
         url = f"{self.base_url}{endpoint}"
-        response = self.client.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return await self._cached_get(url, params, ttl)
 
-    def _make_public_market_data_request(self, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def _make_public_market_data_request(self, endpoint: str, params: Dict[str, Any] = None, ttl: float = 0) -> Dict[str, Any]:
         """Make public request to CoinDCX market data API."""
         url = f"https://public.coindcx.com{endpoint}"
-        response = self.client.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+        return await self._cached_get(url, params, ttl)
+
+    def invalidate(self):
+        """Drop all cached responses and the markets index so the next calls refetch."""
+        self._response_cache = {}
+        self._markets_cache = None
+        self._markets_cache_ts = 0.0
+        self._pair_index = {}
+        self._formatted_pairs = {}
 
-    def _format_pair_for_public_api(self, pair: str) -> str:
+    async def _get_markets_details_cached(self, ttl: float = _MARKETS_TTL) -> list:
+        """Get the full markets_details listing, refetching it once the cache is older than ttl seconds."""
+        now = time.monotonic()
+        if self._markets_cache is None or now - self._markets_cache_ts > ttl:
+            markets = await self._make_public_request("/exchange/v1/markets_details", ttl=ttl)
+            if markets is self._markets_cache:
+                # Revalidated with a 304; the existing index still applies
+                self._markets_cache_ts = now
+                return markets
+            pair_index = {}
+            for market in markets:
+                for key in ("coindcx_name", "symbol", "pair"):
+                    value = market.get(key)
+                    if value:
+                        pair_index.setdefault(value.upper(), market)
+                # Also index KC-BTC_USDT / KC-ETH_BTC style pairs under BTCUSDT / ETHBTC
+                api_pair = market.get("pair", "").upper()
+                if api_pair.startswith("KC-"):
+                    for quote in ("USDT", "BTC"):
+                        suffix = f"_{quote}"
+                        if suffix in api_pair:
+                            pair_index.setdefault(api_pair[3:].replace(suffix, quote), market)
+            self._markets_cache = markets
+            self._markets_cache_ts = now
+            self._pair_index = pair_index
+            self._formatted_pairs = {}
+        return self._markets_cache
+
+    def _lookup_market(self, pair: str) -> Optional[Dict[str, Any]]:
+        """Find a market in the cached pair index by coindcx_name, symbol or KC- pair."""
+        return self._pair_index.get(pair.upper())
+
+    async def _format_pair_for_public_api(self, pair: str) -> str:
         """Convert pair format from BTCUSDT to B-BTC_USDT for public API."""
-        # First, try to find the pair in market details to get the correct format
+        # Common quote assets can be formatted without touching the network
+        pair_upper = pair.upper()
+        for suffix, prefix, quote in _SUFFIX_MAP:
+            if pair_upper.endswith(suffix):
+                return f"{prefix}{pair_upper[:-len(suffix)]}{quote}"
+        
+        formatted = self._formatted_pairs.get(pair_upper)
+        if formatted is not None:
+            return formatted
+        
+        # Unknown quote asset: find the pair in market details to get the correct format
         try:
-            market_details = self.get_market_details(pair)
-            if market_details and not market_details.get('error'):
-                # Extract the pair format from market details
-                api_pair = market_details.get('pair', '')
-                if api_pair.startswith('KC-'):
-                    # Convert KC-BTC_USDT to B-BTC_USDT
-                    return api_pair.replace('KC-', 'B-')
-        except:
-            pass
-        
-        # Fallback: manually format common pairs
-        if pair.upper().endswith('USDT'):
-            base = pair.upper().replace('USDT', '')
-            return f"B-{base}_USDT"
-        elif pair.upper().endswith('BTC'):
-            base = pair.upper().replace('BTC', '')
-            return f"B-{base}_BTC"
-        elif pair.upper().endswith('INR'):
-            base = pair.upper().replace('INR', '')
-            return f"I-{base}_INR"
-        else:
-            # Default fallback
-            return f"B-{pair.upper()}"
+            await self._get_markets_details_cached()
+        except Exception:
+            # Market listing unavailable; don't cache the guess
+            return f"B-{pair_upper}"
+        
+        formatted = f"B-{pair_upper}"  # Default fallback
+        market_details = self._lookup_market(pair_upper)
+        if market_details:
+            # Extract the pair format from market details
+            api_pair = market_details.get('pair', '')
+            if api_pair.startswith('KC-'):
+                # Convert KC-BTC_USDT to B-BTC_USDT
+                formatted = api_pair.replace('KC-', 'B-')
+        
+        self._formatted_pairs[pair_upper] = formatted
+        return formatted
 
     # Public endpoints
-    def get_ticker(self) -> Dict[str, Any]:
+    async def get_ticker(self) -> Dict[str, Any]:
         """Get ticker data for all markets."""
-        return self._make_public_request("/exchange/ticker")
+        return await self._make_public_request("/exchange/ticker", ttl=_TICKER_TTL)
 
-    def get_markets(self) -> Dict[str, Any]:
+    async def get_markets(self) -> Dict[str, Any]:
         """Get all available markets."""
-        return self._make_public_request("/exchange/v1/markets")
+        return await self._make_public_request("/exchange/v1/markets", ttl=_MARKETS_TTL)
 
-    def get_market_details(self, pair: str = None) -> Dict[str, Any]:
+    async def get_market_details(self, pair: str = None) -> Dict[str, Any]:
         """Get market details. If pair is specified, filter for that specific trading pair."""
-        all_markets = self._make_public_request("/exchange/v1/markets_details")
+        all_markets = await self._get_markets_details_cached()
         
         if pair:
-            # Filter for the specific pair
-            for market in all_markets:
-                if (market.get("coindcx_name", "").upper() == pair.upper() or 
-                    market.get("symbol", "").upper() == pair.upper() or
-                    market.get("pair", "").upper() == f"KC-{pair.upper().replace('USDT', '_USDT')}" or
-                    market.get("pair", "").upper() == f"KC-{pair.upper().replace('BTC', '_BTC')}"):
-                    return market
+            # Look up the specific pair in the cached index
+            market = self._lookup_market(pair)
+            if market:
+                return market
             
             # If not found, return error message
             return {"error": f"Trading pair '{pair}' not found"}
         
         return all_markets
 
-    def get_trades(self, pair: str, limit: int = 30) -> Dict[str, Any]:
+    async def get_trades(self, pair: str, limit: int = 30) -> Dict[str, Any]:
         """Get recent trades for a market."""
         # Convert pair format from BTCUSDT to B-BTC_USDT
-        formatted_pair = self._format_pair_for_public_api(pair)
+        formatted_pair = await self._format_pair_for_public_api(pair)
         params = {"pair": formatted_pair, "limit": limit}
-        return self._make_public_market_data_request("/market_data/trade_history", params)
+        return await self._make_public_market_data_request("/market_data/trade_history", params)
 
-    def get_order_book(self, pair: str) -> Dict[str, Any]:
+    async def get_order_book(self, pair: str) -> Dict[str, Any]:
         """Get order book for a market."""
         # Convert pair format from BTCUSDT to B-BTC_USDT
-        formatted_pair = self._format_pair_for_public_api(pair)
+        formatted_pair = await self._format_pair_for_public_api(pair)
         params = {"pair": formatted_pair}
-        return self._make_public_market_data_request("/market_data/orderbook", params)
+        return await self._make_public_market_data_request("/market_data/orderbook", params)
 
-    def get_candles(self, pair: str, interval: str, start_time: int, end_time: int, limit: int = 1000) -> Dict[str, Any]:
+    async def get_candles(self, pair: str, interval: str, start_time: int, end_time: int, limit: int = 1000) -> Dict[str, Any]:
         """Get candlestick data."""
         # Convert pair format from BTCUSDT to B-BTC_USDT
-        formatted_pair = self._format_pair_for_public_api(pair)
+        formatted_pair = await self._format_pair_for_public_api(pair)
         params = {
             "pair": formatted_pair,
             "interval": interval,
             "limit": limit
         }
         
-        # Only add time parameters if they seem reasonable
-        # Check if start_time is not in the future or too far in the past
-        current_time = int(time.time() * 1000)
-        one_year_ago = current_time - (365 * 24 * 60 * 60 * 1000)
-        
-        # Add time parameters only if they're within a reasonable range
-        if start_time >= one_year_ago and start_time <= current_time and end_time <= current_time:
-            params["startTime"] = start_time
-            params["endTime"] = end_time
-        
-        result = self._make_public_market_data_request("/market_data/candles", params)
-        
-        # If no data returned with time params, try without time constraints
-        if isinstance(result, list) and len(result) == 0 and ("startTime" in params or "endTime" in params):
-            # Remove time parameters and try again
-            params_no_time = {
-                "pair": formatted_pair,
-                "interval": interval,
-                "limit": limit
-            }
-            result = self._make_public_market_data_request("/market_data/candles", params_no_time)
-            
+        # Only add time parameters if they seem reasonable:
+        # start_time is within the last year and neither bound is in the future
+        now = time.time_ns() // 1_000_000
+        if not (now - _ONE_YEAR_MS <= start_time <= now and end_time <= now):
+            return await self._make_public_market_data_request("/market_data/candles", params)
+        
+        params["startTime"] = start_time
+        params["endTime"] = end_time
+
+        # Fire the time-bounded request and the unbounded fallback together so
+        # an empty time window doesn't cost a second sequential round-trip
+        params_no_time = {
+            "pair": formatted_pair,
+            "interval": interval,
+            "limit": limit
+        }
+        fallback_task = asyncio.create_task(
+            self._make_public_market_data_request("/market_data/candles", params_no_time)
+        )
+        try:
+            result = await self._make_public_market_data_request("/market_data/candles", params)
+        except BaseException:
+            fallback_task.cancel()
+            raise
+        
+        if not (isinstance(result, list) and len(result) == 0):
+            # Got data for the requested window; the fallback isn't needed
+            fallback_task.cancel()
+            return result
+        
+        fallback = await fallback_task
+
+        # No data returned with time params, so use the unconstrained result
+        if isinstance(fallback, list) and len(fallback) > 0:
             # Add a note about the fallback
-            if isinstance(result, list) and len(result) > 0:
-                return {
-                    "data": result,
-                    "note": f"No data found for specified time range ({start_time} to {end_time}). Returning most recent {len(result)} candles instead.",
-                    "requested_start_time": start_time,
-                    "requested_end_time": end_time
-                }
+            return {
+                "data": fallback,
+                "note": f"No data found for specified time range ({start_time} to {end_time}). Returning most recent {len(fallback)} candles instead.",
+                "requested_start_time": start_time,
+                "requested_end_time": end_time
+            }
         
-        return result
+        return fallback
 
     # User endpoints
-    def get_balances(self) -> Dict[str, Any]:
+    async def get_balances(self) -> Dict[str, Any]:
         """Get account balances."""
-        return self._make_authenticated_request("POST", "/exchange/v1/users/balances")
+        return await self._make_authenticated_request("POST", "/exchange/v1/users/balances")
 
-    def get_user_info(self) -> Dict[str, Any]:
+    async def get_user_info(self) -> Dict[str, Any]:
         """Get user information."""
-        return self._make_authenticated_request("POST", "/exchange/v1/users/info")
+        return await self._make_authenticated_request("POST", "/exchange/v1/users/info")
 
     # Order endpoints
-    def create_order(self, side: str, order_type: str, market: str, price: float = None, 
-                    quantity: float = None, total_quantity: float = None, 
-                    client_order_id: str = None) -> Dict[str, Any]:
+    async def create_order(self, side: str, order_type: str, market: str, price: float = None, 
+                          quantity: float = None, total_quantity: float = None, 
+                          client_order_id: str = None) -> Dict[str, Any]:
         """Create a new order."""
         payload = {
             "side": side,
@@ -205,30 +393,30 @@ class CoinDCXClient:
         if client_order_id is not None:
             payload["client_order_id"] = client_order_id
             
-        return self._make_authenticated_request("POST", "/exchange/v1/orders/create", payload)
+        return await self._make_authenticated_request("POST", "/exchange/v1/orders/create", payload)
 
-    def get_order_status(self, order_id: str) -> Dict[str, Any]:
+    async def get_order_status(self, order_id: str) -> Dict[str, Any]:
         """Get order status."""
         payload = {"id": order_id}
-        return self._make_authenticated_request("POST", "/exchange/v1/orders/status", payload)
+        return await self._make_authenticated_request("POST", "/exchange/v1/orders/status", payload)
 
-    def cancel_order(self, order_id: str) -> Dict[str, Any]:
+    async def cancel_order(self, order_id: str) -> Dict[str, Any]:
         """Cancel an order."""
         payload = {"id": order_id}
-        return self._make_authenticated_request("POST", "/exchange/v1/orders/cancel", payload)
+        return await self._make_authenticated_request("POST", "/exchange/v1/orders/cancel", payload)
 
-    def get_active_orders(self, market: str = None, side: str = None) -> Dict[str, Any]:
+    async def get_active_orders(self, market: str = None, side: str = None) -> Dict[str, Any]:
         """Get active orders."""
         payload = {}
         if market:
             payload["market"] = market
         if side:
             payload["side"] = side
-        return self._make_authenticated_request("POST", "/exchange/v1/orders/active_orders", payload)
+        return await self._make_authenticated_request("POST", "/exchange/v1/orders/active_orders", payload)
 
-    def get_order_history(self, market: str = None, side: str = None, 
-                         from_timestamp: int = None, to_timestamp: int = None, 
-                         limit: int = 500) -> Dict[str, Any]:
+    async def get_order_history(self, market: str = None, side: str = None, 
+                               from_timestamp: int = None, to_timestamp: int = None, 
+                               limit: int = 500) -> Dict[str, Any]:
         """Get order history."""
         payload = {"limit": limit}
         if market:
@@ -239,8 +427,8 @@ class CoinDCXClient:
             payload["from_timestamp"] = from_timestamp  # Correct parameter name
         if to_timestamp:
             payload["to_timestamp"] = to_timestamp  # Correct parameter name
-        return self._make_authenticated_request("POST", "/exchange/v1/orders/trade_history", payload)
+        return await self._make_authenticated_request("POST", "/exchange/v1/orders/trade_history", payload)
 
-    def close(self):
+    async def close(self):
         """Close the HTTP client."""
-        self.client.close()
+        await self.client.aclose()
@@ -8,24 +8,29 @@ load_dotenv()
 class Config:
     """Configuration settings for CoinDCX MCP server."""
     
+    __slots__ = ('api_key', 'secret_key', 'base_url', 'sandbox_mode', 'missing', 'valid')
+    
     def __init__(self):
         self.api_key = os.getenv("COINDCX_API_KEY", "")
         self.secret_key = os.getenv("COINDCX_SECRET_KEY", "")
         self.base_url = os.getenv("COINDCX_BASE_URL", "https://api.coindcx.com")
         self.sandbox_mode = os.getenv("COINDCX_SANDBOX_MODE", "false").lower() == "true"
+        # Settings are read once, so work out what's missing up front
+        self.missing = [
+            name for name, value in (
+                ("COINDCX_API_KEY", self.api_key),
+                ("COINDCX_SECRET_KEY", self.secret_key),
+            ) if not value
+        ]
+        self.valid = not self.missing
         
     def validate(self) -> bool:
         """Validate that required configuration is present."""
-        return bool(self.api_key and self.secret_key)
+        return self.valid
     
     def get_missing_config(self) -> list[str]:
         """Get list of missing required configuration items."""
-        missing = []
-        if not self.api_key:
-            missing.append("COINDCX_API_KEY")
-        if not self.secret_key:
-            missing.append("COINDCX_SECRET_KEY")
-        return missing
+        return list(self.missing)
 
 
 config = Config()
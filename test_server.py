@@ -12,6 +12,12 @@ async def test_server():
     print("Testing CoinDCX MCP Server...")
     
     try:
+        from coindcx_mcp.server import init_client
+        try:
+            init_client()
+        except ValueError as e:
+            print(f"Note: {str(e)}")
+        
         # Test listing tools
         print("\n1. Testing tool listing...")
         from coindcx_mcp.server import list_tools